@@ -12,10 +12,10 @@ import os
 import argparse
 
 
-def fetch_sleep_data():
+def fetch_sleep_data(api_token=None, timeout=30):
     """Fetch sleep session data from the API."""
-    # Get the API token from environment variable
-    api_token = os.getenv("CONSENSUS_API_TOKEN")
+    # Fall back to the API token from environment variable
+    api_token = api_token or os.getenv("CONSENSUS_API_TOKEN")
     if not api_token:
         print(
             "Error: CONSENSUS_API_TOKEN environment variable not set", file=sys.stderr
@@ -34,7 +34,7 @@ def fetch_sleep_data():
         "User-Agent": "sleep-data-exporter/1.0",
     }
 
-    response = requests.get(url, headers=headers)
+    response = requests.get(url, headers=headers, timeout=timeout)
     response.raise_for_status()
     return response.json()
 
@@ -51,10 +51,10 @@ def parse_date_string(date_str):
 # Function to transform records
 
 
-def transform_record(record, user_id):
+def transform_record(record, user_id, date=None):
     return {
         "user_id": user_id,
-        "date": parse_date_string(record["date"]),
+        "date": date if date is not None else parse_date_string(record["date"]),
         "date_unix": record["date_unix"],
         "uid": record["uid"],
         "comments": record.get("comments"),
@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Join sleep records with per-day workout features across all users and write
+the result as a single Parquet file for analysis.
+"""
+
+import argparse
+
+import pandas as pd
+
+from import_data import supabase
+
+PAGE_SIZE = 1000
+
+# Columns fetched per table with explicit dtypes, so the Parquet schema
+# doesn't depend on which values happen to be NULL
+SLEEP_COLUMNS = {
+    "user_id": "string",
+    "date": "string",
+    "time_got_into_bed": "string",
+    "time_tried_to_sleep": "string",
+    "time_to_fall_asleep_mins": "float64",
+    "times_woke_up_count": "float64",
+    "total_awake_time_mins": "float64",
+    "final_awakening_time": "string",
+    "time_got_out_of_bed": "string",
+    "sleep_quality_rating": "string",
+}
+
+WORKOUT_COLUMNS = {
+    "user_id": "string",
+    "workout_date": "string",
+    "duration_seconds": "float64",
+    "calories": "float64",
+    "distance_km": "float64",
+    "avg_heart_rate": "float64",
+}
+
+
+def fetch_table(table, columns):
+    """
+    Fetch every row of a table, bypassing the PostgREST row limit.
+
+    Pages are keyed on the primary key rather than offsets, so each request
+    is an index range scan and paging continues until an empty page.
+    """
+    rows = []
+    last_id = None
+    while True:
+        query = (
+            supabase.table(table)
+            .select(",".join(["id", *columns]))
+            .order("id")
+            .limit(PAGE_SIZE)
+        )
+        if last_id is not None:
+            query = query.gt("id", last_id)
+        response = query.execute()
+        if not response.data:
+            break
+        rows.extend(response.data)
+        last_id = response.data[-1]["id"]
+    return pd.DataFrame(rows, columns=list(columns)).astype(columns)
+
+
+def time_to_hours(series):
+    """Convert HH:MM:SS strings to decimal hours, leaving nulls as NaN."""
+    return pd.to_timedelta(series).dt.total_seconds() / 3600
+
+
+def sleep_features(sleep):
+    """
+    Compute per-night sleep metrics.
+
+    Sleep records are dated by the morning of waking, so each night is keyed
+    by the previous calendar day, the training day it follows. Overnight
+    spans wrap at midnight; DST transitions are ignored.
+    """
+    time_in_bed = time_to_hours(sleep["time_got_into_bed"])
+    time_out_of_bed = time_to_hours(sleep["time_got_out_of_bed"])
+    time_tried_to_sleep = time_to_hours(sleep["time_tried_to_sleep"])
+    final_awakening = time_to_hours(sleep["final_awakening_time"])
+
+    fall_asleep_hours = sleep["time_to_fall_asleep_mins"].fillna(0) / 60
+    awake_hours = sleep["total_awake_time_mins"].fillna(0) / 60
+
+    total_time_in_bed = (time_out_of_bed - time_in_bed) % 24
+    sleep_period = (final_awakening - time_tried_to_sleep) % 24
+    total_time_asleep = (sleep_period - fall_asleep_hours - awake_hours).clip(lower=0)
+
+    wake_date = pd.to_datetime(sleep["date"]).astype("datetime64[us]")
+    return pd.DataFrame(
+        {
+            "user_id": sleep["user_id"],
+            "day": wake_date - pd.Timedelta(days=1),
+            "sleep_date": wake_date,
+            "total_time_in_bed_hours": total_time_in_bed,
+            "total_time_asleep_hours": total_time_asleep,
+            "sleep_efficiency": (
+                total_time_asleep / total_time_in_bed.where(total_time_in_bed > 0)
+            )
+            * 100,
+            "time_to_fall_asleep_mins": sleep["time_to_fall_asleep_mins"],
+            "times_woke_up_count": sleep["times_woke_up_count"],
+            "total_awake_time_mins": sleep["total_awake_time_mins"],
+            "sleep_quality_rating": sleep["sleep_quality_rating"],
+        }
+    )
+
+
+def workout_features(workouts, timezone):
+    """
+    Aggregate workouts to one row per user and local calendar day.
+
+    Training load is workout minutes scaled by average heart rate relative to
+    100 bpm, falling back to plain minutes when heart rate wasn't recorded.
+    """
+    local_day = (
+        pd.to_datetime(workouts["workout_date"], utc=True)
+        .dt.tz_convert(timezone)
+        .dt.tz_localize(None)
+        .dt.normalize()
+        .astype("datetime64[us]")
+    )
+    duration_mins = workouts["duration_seconds"] / 60
+    heart_rate = workouts["avg_heart_rate"]
+
+    daily = pd.DataFrame(
+        {
+            "user_id": workouts["user_id"],
+            "day": local_day,
+            "workout_count": 1,
+            "workout_duration_mins": duration_mins,
+            "workout_calories": workouts["calories"],
+            "workout_distance_km": workouts["distance_km"],
+            # Weight heart rate by duration so long sessions dominate the average
+            "hr_weighted": heart_rate * duration_mins,
+            "hr_minutes": duration_mins.where(heart_rate.notna()),
+            "training_load": duration_mins * (heart_rate / 100).fillna(1),
+        }
+    )
+
+    daily = daily.groupby(["user_id", "day"], as_index=False, sort=True).sum(
+        min_count=1
+    )
+    daily["workout_avg_heart_rate"] = daily["hr_weighted"] / daily["hr_minutes"]
+    return daily.drop(columns=["hr_weighted", "hr_minutes"])
+
+
+def join_sleep_and_workouts(sleep, workouts, timezone):
+    """
+    Sort-merge sleep nights with daily workout features on (user_id, day).
+
+    Rest days count as zero workout minutes, distance and load, while
+    calories and heart rate stay missing. Rolling 7 and 28 day training
+    loads are calendar windows ending on each day, so gaps count as zero.
+    """
+    nights = sleep_features(sleep).sort_values(["user_id", "day"])
+    daily = workout_features(workouts, timezone)
+
+    joined = pd.merge_ordered(nights, daily, on=["user_id", "day"], how="outer")
+    rest_day = joined["workout_count"].isna()
+    zero_on_rest_days = [
+        "workout_count",
+        "workout_duration_mins",
+        "workout_distance_km",
+        "training_load",
+    ]
+    joined.loc[rest_day, zero_on_rest_days] = 0
+    joined["workout_count"] = joined["workout_count"].astype(int)
+
+    rolling = joined.groupby("user_id", sort=True).rolling("7D", on="day")[
+        "training_load"
+    ]
+    joined["training_load_7d"] = rolling.sum().to_numpy()
+    rolling = joined.groupby("user_id", sort=True).rolling("28D", on="day")[
+        "training_load"
+    ]
+    joined["training_load_28d"] = rolling.sum().to_numpy()
+
+    # Acute:chronic workload ratio, comparing daily averages over each window
+    joined["acute_chronic_ratio"] = (joined["training_load_7d"] / 7) / (
+        joined["training_load_28d"] / 28
+    ).where(joined["training_load_28d"] > 0)
+    return joined
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Join sleep records with daily workout features into a Parquet file"
+    )
+    parser.add_argument("output", help="Path of the Parquet file to write")
+    parser.add_argument(
+        "--timezone",
+        default="UTC",
+        help="Time zone used to assign workouts to calendar days (default: UTC)",
+    )
+
+    args = parser.parse_args()
+
+    print("📥 Fetching sleep records...")
+    sleep = fetch_table("sleep_records", SLEEP_COLUMNS)
+    print(f"📖 Found {len(sleep)} sleep records")
+
+    print("📥 Fetching workouts...")
+    workouts = fetch_table("workouts", WORKOUT_COLUMNS)
+    print(f"📖 Found {len(workouts)} workouts")
+
+    joined = join_sleep_and_workouts(sleep, workouts, args.timezone)
+    joined.to_parquet(args.output, index=False)
+
+    print(f"🎉 Wrote {len(joined)} rows to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
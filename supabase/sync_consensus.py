@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+"""
+Continuously sync sleep diary entries from the Consensus Sleep Diary API
+straight into the Supabase sleep_records table, without intermediate files.
+"""
+
+import os
+import sys
+import time
+import argparse
+from datetime import datetime, timezone
+
+import httpx
+import requests
+from gotrue.errors import AuthError
+from postgrest.exceptions import APIError
+
+# export_sleep_data.py lives in the repository root
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from export_sleep_data import fetch_sleep_data, process_data  # noqa: E402
+from import_data import supabase, transform_record  # noqa: E402
+
+SECONDS_PER_DAY = 24 * 60 * 60
+
+
+def resolve_record_date(record):
+    """
+    Resolve the diary's "June 3" style date to an ISO date.
+
+    The year is taken from whichever valid candidate lands closest to the
+    record's date_unix, rather than guessing relative to today.
+    """
+    date_str = record.get("date")
+    date_unix = record.get("date_unix")
+    if not date_str or date_unix is None:
+        return None
+
+    anchor = datetime.fromtimestamp(int(date_unix), tz=timezone.utc).replace(
+        tzinfo=None
+    )
+    candidates = []
+    for year in (anchor.year - 1, anchor.year, anchor.year + 1):
+        try:
+            candidates.append(datetime.strptime(f"{date_str} {year}", "%B %d %Y"))
+        except ValueError:
+            # February 29 only exists in leap years
+            continue
+    if not candidates:
+        return None
+
+    date = min(candidates, key=lambda candidate: abs(candidate - anchor))
+    return date.strftime("%Y-%m-%d")
+
+
+def find_user_id(user_email):
+    """Look up an existing Supabase user's ID by email."""
+    users_response = supabase.auth.admin.list_users()
+    existing_user = next((u for u in users_response if u.email == user_email), None)
+    if not existing_user:
+        raise ValueError(f"User {user_email} not found, create them first")
+    return existing_user.id
+
+
+def parse_account(account):
+    """Parse an EMAIL[=TOKEN_ENV_VAR] account specification."""
+    email, _, token_env = account.partition("=")
+    token_env = token_env or "CONSENSUS_API_TOKEN"
+    api_token = os.getenv(token_env)
+    if not api_token:
+        raise ValueError(f"{token_env} environment variable not set for {email}")
+    return email, api_token
+
+
+def sync_user(user_id, api_token, watermark, lookback_days, batch_size):
+    """
+    Fetch, transform and upsert one user's diary entries.
+
+    Returns the updated watermark and the number of records upserted. Entries
+    are skipped entirely while the session's updatedAt is unchanged, and
+    otherwise only days from lookback_days before the last synced day onwards
+    are re-sent, so recent edits are picked up without a full re-import.
+    """
+    data = fetch_sleep_data(api_token)
+    if data is None:
+        raise ValueError("Consensus API token missing")
+
+    session_updated_at = data.get("data", {}).get("updatedAt")
+    if watermark and session_updated_at == watermark["updated_at"]:
+        return watermark, 0
+
+    records = process_data(data) or []
+
+    since_unix = None
+    if watermark and watermark["date_unix"] is not None:
+        since_unix = watermark["date_unix"] - lookback_days * SECONDS_PER_DAY
+
+    transformed_records = []
+    for record in records:
+        if record.get("complete") is not True or record.get("date_unix") is None:
+            continue
+        if since_unix is not None and int(record["date_unix"]) < since_unix:
+            continue
+        date = resolve_record_date(record)
+        if date is None:
+            continue
+        transformed_records.append(transform_record(record, user_id, date))
+
+    for i in range(0, len(transformed_records), batch_size):
+        batch = transformed_records[i : i + batch_size]
+        supabase.table("sleep_records").upsert(
+            batch, on_conflict="user_id,date"
+        ).execute()
+
+    synced_unix = [int(record["date_unix"]) for record in transformed_records]
+    previous_unix = watermark["date_unix"] if watermark else None
+    if previous_unix is not None:
+        synced_unix.append(previous_unix)
+
+    new_watermark = {
+        "updated_at": session_updated_at,
+        "date_unix": max(synced_unix) if synced_unix else None,
+    }
+    return new_watermark, len(transformed_records)
+
+
+def run(accounts, min_interval, max_interval, lookback_days, batch_size, once):
+    """
+    Poll every account, backing off while nothing changes.
+
+    User IDs are looked up lazily, so a transient auth failure is retried on
+    the next poll and an unknown email only drops that account.
+    """
+    accounts = dict(accounts)
+    user_ids = {}
+    watermarks = {}
+    interval = min_interval
+
+    while True:
+        changed = False
+        for email, api_token in list(accounts.items()):
+            if email not in user_ids:
+                try:
+                    user_ids[email] = find_user_id(email)
+                except ValueError as e:
+                    print(f"❌ Error: {e}")
+                    del accounts[email]
+                    continue
+                except (AuthError, httpx.HTTPError) as e:
+                    print(f"⚠️  User lookup failed for {email}: {e}")
+                    continue
+                print(f"✅ Syncing {email} as user {user_ids[email]}")
+
+            user_id = user_ids[email]
+            try:
+                watermark, count = sync_user(
+                    user_id,
+                    api_token,
+                    watermarks.get(user_id),
+                    lookback_days,
+                    batch_size,
+                )
+            except (
+                requests.RequestException,
+                httpx.HTTPError,
+                APIError,
+                ValueError,
+            ) as e:
+                # Keep the old watermark so the next poll retries this user
+                print(f"⚠️  Sync failed for {email}: {e}")
+                continue
+
+            watermarks[user_id] = watermark
+            if count:
+                changed = True
+                print(f"📝 Upserted {count} records for {email}")
+
+        if not accounts:
+            print("❌ Error: No accounts left to sync")
+            exit(1)
+
+        if once:
+            return
+
+        # Poll quickly while entries are arriving, slow down when idle
+        interval = min_interval if changed else min(interval * 2, max_interval)
+        print(f"💤 Next sync in {interval}s")
+        time.sleep(interval)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Sync sleep data from Consensus Sleep Diary API to Supabase"
+    )
+    parser.add_argument(
+        "accounts",
+        nargs="+",
+        help="Accounts to sync as EMAIL[=TOKEN_ENV_VAR] (token defaults to CONSENSUS_API_TOKEN)",
+    )
+    parser.add_argument(
+        "--min-interval",
+        type=int,
+        default=60,
+        help="Seconds between polls while data is changing (default: 60)",
+    )
+    parser.add_argument(
+        "--max-interval",
+        type=int,
+        default=900,
+        help="Upper bound on seconds between polls when idle (default: 900)",
+    )
+    parser.add_argument(
+        "--lookback-days",
+        type=int,
+        default=7,
+        help="Re-sync days this far before the last synced day to catch edits (default: 7)",
+    )
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=50,
+        help="Number of records to upsert per batch (default: 50)",
+    )
+    parser.add_argument(
+        "--once",
+        action="store_true",
+        help="Run a single sync pass and exit",
+    )
+
+    args = parser.parse_args()
+
+    if args.min_interval < 1:
+        parser.error("--min-interval must be at least 1 second")
+    if args.max_interval < args.min_interval:
+        parser.error("--max-interval must not be less than --min-interval")
+
+    try:
+        accounts = [parse_account(account) for account in args.accounts]
+    except ValueError as e:
+        print(f"❌ Error: {e}")
+        exit(1)
+
+    print("🚀 Starting Consensus sync...")
+    try:
+        run(
+            accounts,
+            args.min_interval,
+            args.max_interval,
+            args.lookback_days,
+            args.batch_size,
+            args.once,
+        )
+    except KeyboardInterrupt:
+        print("👋 Sync stopped")
+
+
+if __name__ == "__main__":
+    main()
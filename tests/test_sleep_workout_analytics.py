@@ -0,0 +1,243 @@
+import os
+import sys
+
+import pytest
+
+pd = pytest.importorskip("pandas")
+pa = pytest.importorskip("pyarrow")
+
+# import_data creates a Supabase client at import time
+os.environ.setdefault("SUPABASE_URL", "http://localhost:54321")
+os.environ.setdefault("SUPABASE_SERVICE_KEY", "test-service-key")
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "supabase"))
+
+import sleep_workout_analytics  # noqa: E402
+from sleep_workout_analytics import (  # noqa: E402
+    SLEEP_COLUMNS,
+    WORKOUT_COLUMNS,
+    fetch_table,
+    join_sleep_and_workouts,
+    sleep_features,
+    workout_features,
+)
+
+
+def sleep_frame(*rows):
+    return pd.DataFrame(list(rows), columns=list(SLEEP_COLUMNS)).astype(SLEEP_COLUMNS)
+
+
+def workout_frame(*rows):
+    return pd.DataFrame(list(rows), columns=list(WORKOUT_COLUMNS)).astype(
+        WORKOUT_COLUMNS
+    )
+
+
+def night(user_id, date, **fields):
+    return {"user_id": user_id, "date": date, **fields}
+
+
+def workout(user_id, workout_date, minutes, heart_rate=None, **fields):
+    return {
+        "user_id": user_id,
+        "workout_date": workout_date,
+        "duration_seconds": minutes * 60,
+        "avg_heart_rate": heart_rate,
+        **fields,
+    }
+
+
+def test_sleep_features_wrap_at_midnight():
+    nights = sleep_features(
+        sleep_frame(
+            night(
+                "a",
+                "2024-03-02",
+                time_got_into_bed="22:30:00",
+                time_tried_to_sleep="23:00:00",
+                time_to_fall_asleep_mins=15,
+                total_awake_time_mins=20,
+                final_awakening_time="06:30:00",
+                time_got_out_of_bed="07:00:00",
+            )
+        )
+    )
+
+    row = nights.iloc[0]
+    assert row["day"] == pd.Timestamp("2024-03-01")
+    assert row["sleep_date"] == pd.Timestamp("2024-03-02")
+    assert row["total_time_in_bed_hours"] == 8.5
+    assert row["total_time_asleep_hours"] == pytest.approx(7.5 - 35 / 60)
+    assert row["sleep_efficiency"] == pytest.approx((7.5 - 35 / 60) / 8.5 * 100)
+
+
+def test_workout_features_bucket_by_local_day():
+    daily = workout_features(
+        workout_frame(
+            workout("a", "2024-03-01T22:30:00+00:00", 30),
+            workout("a", "2024-03-01T23:30:00+00:00", 20),
+        ),
+        "Europe/Berlin",
+    )
+
+    assert daily["day"].tolist() == [
+        pd.Timestamp("2024-03-01"),
+        pd.Timestamp("2024-03-02"),
+    ]
+    assert daily["workout_duration_mins"].tolist() == [30, 20]
+
+
+def test_workout_features_weight_heart_rate_by_duration():
+    daily = workout_features(
+        workout_frame(
+            workout("a", "2024-03-01T07:00:00+00:00", 30, 150),
+            workout("a", "2024-03-01T12:00:00+00:00", 10),
+            workout("a", "2024-03-01T18:00:00+00:00", 20, 120),
+        ),
+        "UTC",
+    )
+
+    row = daily.iloc[0]
+    assert row["workout_count"] == 3
+    assert row["workout_duration_mins"] == 60
+    assert row["workout_avg_heart_rate"] == (150 * 30 + 120 * 20) / 50
+    assert row["training_load"] == pytest.approx(30 * 1.5 + 10 + 20 * 1.2)
+
+
+def test_join_rolling_loads_use_calendar_windows():
+    joined = join_sleep_and_workouts(
+        sleep_frame(night("a", "2024-03-09")),
+        workout_frame(
+            workout("a", "2024-03-01T08:00:00+00:00", 30),
+            workout("a", "2024-03-08T08:00:00+00:00", 40),
+        ),
+        "UTC",
+    )
+
+    assert joined["day"].tolist() == [
+        pd.Timestamp("2024-03-01"),
+        pd.Timestamp("2024-03-08"),
+    ]
+    last = joined.iloc[-1]
+    assert last["sleep_date"] == pd.Timestamp("2024-03-09")
+    assert last["training_load_7d"] == 40
+    assert last["training_load_28d"] == 70
+    assert last["acute_chronic_ratio"] == pytest.approx((40 / 7) / (70 / 28))
+
+
+def test_join_rest_days_have_zero_workload():
+    joined = join_sleep_and_workouts(
+        sleep_frame(night("a", "2024-03-05"), night("b", "2024-03-02")),
+        workout_frame(workout("a", "2024-03-01T08:00:00+00:00", 30, 150)),
+        "UTC",
+    )
+
+    assert joined[["user_id", "day"]].values.tolist() == [
+        ["a", pd.Timestamp("2024-03-01")],
+        ["a", pd.Timestamp("2024-03-04")],
+        ["b", pd.Timestamp("2024-03-01")],
+    ]
+    rest_day = joined.iloc[1]
+    assert rest_day["workout_count"] == 0
+    assert rest_day["workout_duration_mins"] == 0
+    assert rest_day["workout_distance_km"] == 0
+    assert rest_day["training_load"] == 0
+    assert pd.isna(rest_day["workout_calories"])
+    assert pd.isna(rest_day["workout_avg_heart_rate"])
+    assert rest_day["training_load_7d"] == 45
+    # Other users' workouts never leak into the rolling windows
+    assert joined.iloc[2]["training_load_28d"] == 0
+
+
+def test_join_schema_does_not_depend_on_nulls():
+    sparse = join_sleep_and_workouts(
+        sleep_frame(night("a", "2024-03-02")),
+        workout_frame(workout("a", "2024-03-01T08:00:00+00:00", 30)),
+        "UTC",
+    )
+    full = join_sleep_and_workouts(
+        sleep_frame(
+            night(
+                "a",
+                "2024-03-02",
+                time_got_into_bed="22:30:00",
+                time_tried_to_sleep="23:00:00",
+                time_to_fall_asleep_mins=15,
+                times_woke_up_count=1,
+                total_awake_time_mins=20,
+                final_awakening_time="06:30:00",
+                time_got_out_of_bed="07:00:00",
+                sleep_quality_rating="good",
+            )
+        ),
+        workout_frame(
+            workout(
+                "a",
+                "2024-03-01T08:00:00+00:00",
+                30,
+                150,
+                calories=300,
+                distance_km="5.000",
+            )
+        ),
+        "UTC",
+    )
+
+    empty = join_sleep_and_workouts(sleep_frame(), workout_frame(), "UTC")
+
+    def schema(frame):
+        return pa.Table.from_pandas(frame, preserve_index=False).schema
+
+    assert schema(sparse).remove_metadata() == schema(full).remove_metadata()
+    assert schema(empty).remove_metadata() == schema(full).remove_metadata()
+
+
+class FakeQuery:
+    def __init__(self, rows, requests):
+        self.rows = rows
+        self.last_id = None
+        requests.append(self)
+
+    def select(self, columns):
+        self.columns = columns
+        return self
+
+    def order(self, column):
+        self.ordered_by = column
+        return self
+
+    def limit(self, count):
+        self.count = count
+        return self
+
+    def gt(self, column, value):
+        self.last_id = value
+        return self
+
+    def execute(self):
+        # Simulate a server max_rows below the page size
+        rows = [
+            row for row in self.rows if self.last_id is None or row["id"] > self.last_id
+        ]
+        response = type("Response", (), {})()
+        response.data = rows[: min(self.count, 300)]
+        return response
+
+
+def test_fetch_table_pages_by_primary_key(monkeypatch):
+    rows = [
+        {"id": f"{i:04d}", "user_id": "a", "workout_date": "2024-03-01T08:00:00Z"}
+        for i in range(750)
+    ]
+    requests = []
+    monkeypatch.setattr(
+        sleep_workout_analytics.supabase,
+        "table",
+        lambda name: FakeQuery(rows, requests),
+    )
+
+    workouts = fetch_table("workouts", WORKOUT_COLUMNS)
+
+    assert len(workouts) == 750
+    assert [request.last_id for request in requests] == [None, "0299", "0599", "0749"]
+    assert all(request.ordered_by == "id" for request in requests)
+    assert workouts["calories"].dtype == "float64"
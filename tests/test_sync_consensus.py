@@ -0,0 +1,172 @@
+import os
+import sys
+
+import pytest
+from gotrue.errors import AuthRetryableError
+
+# import_data creates a Supabase client at import time
+os.environ.setdefault("SUPABASE_URL", "http://localhost:54321")
+os.environ.setdefault("SUPABASE_SERVICE_KEY", "test-service-key")
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "supabase"))
+
+import sync_consensus  # noqa: E402
+from sync_consensus import main, resolve_record_date, run, sync_user  # noqa: E402
+
+FEB_29_2024 = 1709164800
+DEC_31_2024 = 1735603200
+
+
+def test_resolve_record_date_uses_date_unix_year():
+    assert resolve_record_date({"date": "June 3", "date_unix": 1717372800}) == (
+        "2024-06-03"
+    )
+
+
+def test_resolve_record_date_handles_leap_day():
+    record = {"date": "February 29", "date_unix": FEB_29_2024}
+    assert resolve_record_date(record) == "2024-02-29"
+
+
+def test_resolve_record_date_across_new_year():
+    # Local midnight ahead of UTC can put date_unix on the previous day
+    record = {"date": "January 1", "date_unix": DEC_31_2024 + 23 * 60 * 60}
+    assert resolve_record_date(record) == "2025-01-01"
+
+
+def test_resolve_record_date_missing_date_unix():
+    assert resolve_record_date({"date": "June 3", "date_unix": None}) is None
+
+
+class FakeTable:
+    def __init__(self):
+        self.upserted = []
+
+    def upsert(self, batch, on_conflict):
+        self.upserted.extend(batch)
+        return self
+
+    def execute(self):
+        return None
+
+
+@pytest.fixture
+def fake_consensus(monkeypatch):
+    """Serve the given session and records in place of the API and Supabase."""
+    table = FakeTable()
+    monkeypatch.setattr(sync_consensus.supabase, "table", lambda name: table)
+
+    def serve(updated_at, records):
+        data = {"data": {"uid": "u1", "updatedAt": updated_at}}
+        for record in records:
+            record.setdefault("complete", True)
+            record.setdefault("uid", "u1")
+        monkeypatch.setattr(sync_consensus, "fetch_sleep_data", lambda token: data)
+        monkeypatch.setattr(sync_consensus, "process_data", lambda data: records)
+        return table
+
+    return serve
+
+
+def test_sync_user_skips_records_without_date_unix(fake_consensus):
+    table = fake_consensus(
+        "2024-03-01T08:00:00Z",
+        [
+            {"date": "February 29", "date_unix": FEB_29_2024},
+            {"date": "March 1", "date_unix": None},
+            {"date": "March 2"},
+        ],
+    )
+
+    watermark = {"updated_at": "2024-02-28T08:00:00Z", "date_unix": FEB_29_2024}
+    new_watermark, count = sync_user("user-1", "token", watermark, 7, 50)
+
+    assert count == 1
+    assert [row["date"] for row in table.upserted] == ["2024-02-29"]
+    assert new_watermark == {
+        "updated_at": "2024-03-01T08:00:00Z",
+        "date_unix": FEB_29_2024,
+    }
+
+
+def test_sync_user_skips_unchanged_session(fake_consensus):
+    table = fake_consensus(
+        "2024-03-01T08:00:00Z",
+        [{"date": "February 29", "date_unix": FEB_29_2024}],
+    )
+
+    watermark = {"updated_at": "2024-03-01T08:00:00Z", "date_unix": FEB_29_2024}
+    assert sync_user("user-1", "token", watermark, 7, 50) == (watermark, 0)
+    assert table.upserted == []
+
+
+def test_sync_user_only_resends_lookback_window(fake_consensus):
+    day = 24 * 60 * 60
+    table = fake_consensus(
+        "2024-03-01T08:00:00Z",
+        [
+            {"date": "February 21", "date_unix": FEB_29_2024 - 8 * day},
+            {"date": "February 22", "date_unix": FEB_29_2024 - 7 * day},
+            {"date": "February 29", "date_unix": FEB_29_2024},
+            {"date": "March 1", "date_unix": FEB_29_2024 + day},
+        ],
+    )
+
+    watermark = {"updated_at": "2024-02-29T08:00:00Z", "date_unix": FEB_29_2024}
+    new_watermark, count = sync_user("user-1", "token", watermark, 7, 50)
+
+    assert count == 3
+    assert [row["date"] for row in table.upserted] == [
+        "2024-02-22",
+        "2024-02-29",
+        "2024-03-01",
+    ]
+    assert new_watermark["date_unix"] == FEB_29_2024 + day
+
+
+def test_run_keeps_syncing_other_accounts(monkeypatch):
+    def find_user_id(email):
+        if email == "missing@example.com":
+            raise ValueError(f"User {email} not found, create them first")
+        if email == "flaky@example.com":
+            raise AuthRetryableError("Connection refused", 0)
+        return "user-ok"
+
+    synced = []
+
+    def fake_sync_user(user_id, api_token, watermark, lookback_days, batch_size):
+        synced.append(user_id)
+        return {"updated_at": "x", "date_unix": None}, 0
+
+    monkeypatch.setattr(sync_consensus, "find_user_id", find_user_id)
+    monkeypatch.setattr(sync_consensus, "sync_user", fake_sync_user)
+
+    accounts = [
+        ("missing@example.com", "t1"),
+        ("flaky@example.com", "t2"),
+        ("ok@example.com", "t3"),
+    ]
+    run(accounts, 60, 900, 7, 50, once=True)
+
+    assert synced == ["user-ok"]
+
+
+def test_run_exits_when_no_accounts_remain(monkeypatch):
+    def find_user_id(email):
+        raise ValueError(f"User {email} not found, create them first")
+
+    monkeypatch.setattr(sync_consensus, "find_user_id", find_user_id)
+
+    with pytest.raises(SystemExit):
+        run([("missing@example.com", "t1")], 60, 900, 7, 50, once=True)
+
+
+@pytest.mark.parametrize(
+    "intervals",
+    [["--min-interval", "0"], ["--min-interval", "120", "--max-interval", "60"]],
+)
+def test_main_rejects_invalid_intervals(monkeypatch, intervals):
+    monkeypatch.setattr(sys, "argv", ["sync_consensus.py", "a@example.com", *intervals])
+
+    with pytest.raises(SystemExit) as excinfo:
+        main()
+    assert excinfo.value.code == 2